@@ -1,6 +1,9 @@
 # app/api/v4/deps.py
 
-from fastapi import Depends
+from functools import lru_cache
+from typing import Optional
+from fastapi import Depends, Request
+from turbojpeg import TurboJPEG
 from domain.logic.passport_service import PassportService
 from domain.logic.mrz_adapter import MRZScannerAdapter
 from domain.logic.parser_adapter import PassportEyeParser
@@ -9,23 +12,31 @@ import os
 # Dependency injection
 # ----------------------------
 
-def get_mrz_detector() -> MRZScannerAdapter:
+@lru_cache(maxsize=1)
+def build_mrz_detector(jpeg: Optional[TurboJPEG] = None) -> MRZScannerAdapter:
     """
-    Returns a ready-to-use MRZScannerAdapter.
-    Can be replaced with a mock or different adapter for testing.
+    Builds the MRZScannerAdapter once per process (loading the MRZScanner model is expensive).
+    Uses the shared TurboJPEG handle if given, otherwise opens one from TURBOJPEG_DLL_PATH.
     """
-    # Example: provide TurboJPEG path if needed
-    turbojpeg_path = None
     # prefer environment variable; you can also set this in main config
     turbojpeg_path = os.getenv("TURBOJPEG_DLL_PATH")
 
-    return MRZScannerAdapter(turbojpeg_lib_path=turbojpeg_path)  # optional on Windows
-    
-    
+    return MRZScannerAdapter(turbojpeg_lib_path=turbojpeg_path, jpeg=jpeg)  # optional on Windows
+
+
+def get_mrz_detector(request: Request) -> MRZScannerAdapter:
+    """
+    Returns a ready-to-use MRZScannerAdapter sharing the app-wide TurboJPEG handle (app.state.jpeg).
+    Can be replaced with a mock or different adapter for testing.
+    """
+    return build_mrz_detector(getattr(request.app.state, "jpeg", None))
+
 
+@lru_cache(maxsize=1)
 def get_mrz_parser() -> PassportEyeParser:
     """
     Returns a ready-to-use PassportEyeParser.
+    Built once per process and reused across requests.
     Can be replaced with a mock parser for testing.
     """
     return PassportEyeParser()
@@ -9,24 +9,43 @@ from fastapi import (
     Form,
     Request
 )
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from typing import List, Optional, Tuple
+from contextlib import aclosing
+import os
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from schemas.request import PassportRequest
 from schemas.response import PassportResponse
 from app.api.v4.deps import get_passport_service
 from domain.logic.passport_service import PassportService
+from utils.image import sniff_image_format, IMAGE_HEADER_SIZE
 from core.logging import logger
-import tempfile
-import os
 
 router = APIRouter(
     prefix="/v4",
     tags=["passport"],
 )
 
+# Largest number of images accepted by /v4/validate_batch (files or sources)
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 16))
+
+
+async def _read_image_upload(file: UploadFile) -> bytes:
+    """Read an uploaded image, rejecting non-images by their magic bytes (415)."""
+    # Trust the file's magic bytes, not the client-declared content type
+    head = await file.read(IMAGE_HEADER_SIZE)
+    await file.seek(0)
+    if sniff_image_format(head) is None:
+        raise HTTPException(status_code=415, detail="Uploaded file must be a JPEG, PNG or WebP image")
+    return await file.read()
+
+
 # ----------------------------
 # 🔹 Unified Endpoint: POST /v4/passport
 # ----------------------------
-@router.post("/validate", response_model=PassportResponse)
+@router.post("/validate", response_model=PassportResponse, response_class=ORJSONResponse)
 async def process_passport(
     request: Request,
     service: PassportService = Depends(get_passport_service),
@@ -39,44 +58,27 @@ async def process_passport(
     - JSON/Form input with `source` (path, URL, or base64)
     - File upload (`multipart/form-data`)
     """
-    tmp_path = None
-
     try:
-        # Case 1️⃣: File upload (multipart)
+        # Case 1️⃣: File upload (multipart) — decoded in memory, no temp file
         if file is not None:
-            if not (file.content_type and file.content_type.startswith("image/")):
-                raise HTTPException(status_code=400, detail="Uploaded file must be an image")
-
-            suffix = os.path.splitext(file.filename)[1] or ".jpg"
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-                tmp.write(await file.read())
-                tmp_path = tmp.name
-
-            logger.info(f"Processing uploaded image file: {file.filename}")
-            mrz_data = service.process_passport(tmp_path)
+            data = await _read_image_upload(file)
+            logger.info("Processing uploaded image file: %s", file.filename)
+            mrz_data = await run_in_threadpool(service.process_passport_bytes, data)
 
         # Case 2️⃣: JSON or form field source (URL, base64, or local path)
         elif source:
-            logger.info(f"Processing image source: {source[:50]}...")
-            mrz_data = service.process_passport(source)
+            logger.info("Processing image source: %s...", source[:50])
+            mrz_data = await run_in_threadpool(service.process_passport, source)
 
         # Case 3️⃣: No valid input provided
         else:
             raise HTTPException(status_code=400, detail="Please provide an image file or source")
 
-        # Ensure mrz_texts is a flat list of strings ✅
-        mrz_dict = mrz_data.dict()
-        if "mrz_texts" in mrz_dict and isinstance(mrz_dict["mrz_texts"], list):
-            flat_texts = []
-            for item in mrz_dict["mrz_texts"]:
-                if isinstance(item, list):
-                    flat_texts.extend(item)
-                else:
-                    flat_texts.append(item)
-            mrz_dict["mrz_texts"] = flat_texts
+        # Return as response (mrz_texts is already flattened by the detector)
+        return PassportResponse(**mrz_data.model_dump())
 
-        # Return as response
-        return PassportResponse(**mrz_dict)
+    except HTTPException:
+        raise
 
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
@@ -85,10 +87,129 @@ async def process_passport(
         logger.exception("Unexpected error in /v4/passport")
         raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
 
+
+# ----------------------------
+# 🔹 Batch Endpoint: POST /v4/validate_batch
+# ----------------------------
+
+# The batch form is parsed by hand (see _read_batch_form), so document its fields explicitly
+_BATCH_REQUEST_BODY = {
+    "requestBody": {
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "files": {
+                            "type": "array",
+                            "items": {"type": "string", "format": "binary"},
+                            "description": "Passport image files (jpg, png, webp)",
+                        },
+                        "sources": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Image sources: paths, base64 strings, or URLs",
+                        },
+                    },
+                }
+            }
+        }
+    }
+}
+
+
+def _too_many_images(count: Optional[int] = None) -> HTTPException:
+    """413 for a batch over MAX_BATCH_SIZE (count is unknown when the parser stops early)."""
+    counted = f" ({count})" if count is not None else ""
+    return HTTPException(
+        status_code=413,
+        detail=f"Too many images in one batch{counted}; the limit is {MAX_BATCH_SIZE}",
+    )
+
+
+async def _read_batch_form(request: Request) -> Tuple[List[bytes], List[str]]:
+    """
+    Parse the batch form into (uploaded image bytes, sources).
+    MAX_BATCH_SIZE is enforced while parsing (413), before surplus files are spooled.
+    """
+    try:
+        form = await request.form(max_files=MAX_BATCH_SIZE, max_fields=MAX_BATCH_SIZE)
+    except StarletteHTTPException as e:
+        # starlette reports an exceeded max_files / max_fields as 400 "Too many files/fields"
+        if str(e.detail).startswith("Too many"):
+            raise _too_many_images()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    try:
+        files = form.getlist("files")
+        sources = form.getlist("sources")
+        # URL-encoded bodies are not limited by the parser
+        count = len(files or sources)
+        if count > MAX_BATCH_SIZE:
+            raise _too_many_images(count)
+        if not all(isinstance(f, StarletteUploadFile) for f in files) or not all(isinstance(s, str) for s in sources):
+            raise HTTPException(status_code=400, detail="`files` must be file uploads and `sources` text fields")
+
+        buffers = []
+        for i, file in enumerate(files):
+            try:
+                buffers.append(await _read_image_upload(file))
+            except HTTPException as e:
+                raise HTTPException(status_code=e.status_code, detail=f"Image {i}: {e.detail}")
+        return buffers, sources
     finally:
-        # Clean up temporary file if created
-        if tmp_path and os.path.exists(tmp_path):
+        await form.close()
+
+
+@router.post(
+    "/validate_batch",
+    response_model=List[PassportResponse],
+    response_class=ORJSONResponse,
+    openapi_extra=_BATCH_REQUEST_BODY,
+)
+async def process_passport_batch(
+    request: Request,
+    service: PassportService = Depends(get_passport_service),
+):
+    """
+    Process several passport images in one request.
+    Supports either:
+    - File uploads (`files`), decoded and detected in a single worker-thread call
+    - `sources` (path, URL, or base64)
+    Images are detected one at a time (sources are prefetched a few ahead); at most MAX_BATCH_SIZE per request (413).
+    Results are returned in input order; an error names the failing image's (0-based) index.
+    """
+    try:
+        buffers, sources = await _read_batch_form(request)
+
+        # Case 1️⃣: File uploads (multipart)
+        if buffers:
+            logger.info("Processing batch of %d uploaded images", len(buffers))
+            results = await run_in_threadpool(service.process_passport_batch, buffers)
+
+        # Case 2️⃣: Image sources — the next few load while the current one is detected
+        elif sources:
+            logger.info("Processing batch of %d image sources", len(sources))
+            results = []
             try:
-                os.remove(tmp_path)
-            except Exception:
-                logger.warning(f"Failed to delete temp file: {tmp_path}")
+                async with aclosing(service.iter_sources(sources)) as images:
+                    async for image in images:
+                        results.append(await run_in_threadpool(service.process_image, image))
+            except ValueError as e:
+                raise ValueError(f"Image {len(results)}: {e}") from e
+
+        # Case 3️⃣: No valid input provided
+        else:
+            raise HTTPException(status_code=400, detail="Please provide image files or sources")
+
+        return [PassportResponse(**mrz_data.model_dump()) for mrz_data in results]
+
+    except HTTPException:
+        raise
+
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    except Exception as e:
+        logger.exception("Unexpected error in /v4/validate_batch")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {e}")
@@ -1,7 +1,9 @@
 # core/logging.py
 
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
 import sys
 import os
 
@@ -17,20 +19,25 @@ LOG_FILE = os.path.join(LOG_DIR, "passport_api.log")
 # 2️⃣ Logger configuration
 # ----------------------------
 logger = logging.getLogger("passport_api")
-logger.setLevel(logging.INFO)
+logger.setLevel(LOG_LEVEL)
 
-# File handler (rotating)
-file_handler = RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=3)
+# File handler (rotating); delay=True opens the file on first write, not on import
+file_handler = RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=3, delay=True)
 file_formatter = logging.Formatter(
     "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s"
 )
 file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
 
 # Console handler
 console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setFormatter(file_formatter)
-logger.addHandler(console_handler)
+
+# Request threads only enqueue records; a background listener thread does the actual I/O
+log_queue = queue.SimpleQueue()
+queue_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+logger.addHandler(QueueHandler(log_queue))
+queue_listener.start()
+atexit.register(queue_listener.stop)
 
 def setup_logger():
     logger = logging.getLogger("passport_api")
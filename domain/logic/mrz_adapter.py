@@ -2,15 +2,20 @@
 
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Tuple
+from itertools import chain
 import numpy as np
 import cv2
-from skimage import io
 from mrzscanner import MRZScanner
 from turbojpeg import TurboJPEG
 from pathlib import Path
 import os
 
 
+# Longest image edge fed to MRZScanner; larger inputs are downscaled first.
+# MRZ text is still well resolved at this size.
+MAX_LONG_EDGE = 1600
+
+
 # ----------------------------
 # 1. Abstract Interface
 # ----------------------------
@@ -34,19 +39,26 @@ class MRZScannerAdapter(BaseMRZDetector):
     def __init__(
         self,
         turbojpeg_lib_path: Optional[str] = None,
+        jpeg: Optional[TurboJPEG] = None,
         do_center_crop: bool = False,
         do_postprocess: bool = True,
+        max_long_edge: Optional[int] = MAX_LONG_EDGE,
     ):
         """
         Initialize MRZScanner adapter.
 
         Args:
             turbojpeg_lib_path: Optional path to TurboJPEG DLL/so.
+            jpeg: Optional shared TurboJPEG handle; when given, no new library handle is opened.
             do_center_crop: Whether to crop center before inference.
             do_postprocess: Whether to perform postprocessing.
+            max_long_edge: Downscale images whose longest edge exceeds this (None disables).
         """
         self.jpeg = None
-        if turbojpeg_lib_path:
+        if jpeg is not None:
+            # Safe to share across threads: each decode() allocates its own tjhandle
+            self.jpeg = jpeg
+        elif turbojpeg_lib_path:
             turbojpeg_lib_path = Path(turbojpeg_lib_path)
             if not turbojpeg_lib_path.exists():
                 raise FileNotFoundError(f"TurboJPEG library not found: {turbojpeg_lib_path}")
@@ -64,6 +76,7 @@ class MRZScannerAdapter(BaseMRZDetector):
         self.model = MRZScanner()
         self.do_center_crop = do_center_crop
         self.do_postprocess = do_postprocess
+        self.max_long_edge = max_long_edge
 
     # ----------------------------
     # 3. MRZ Detection & Inference
@@ -74,7 +87,7 @@ class MRZScannerAdapter(BaseMRZDetector):
         Run MRZ detection and recognition on an image.
 
         Args:
-            image: numpy RGB array
+            image: numpy BGR array (OpenCV channel order, as returned by utils.image)
 
         Returns:
             {
@@ -83,21 +96,39 @@ class MRZScannerAdapter(BaseMRZDetector):
                 "msg": "No error." | str,
             }
         """
-        if image is None or not isinstance(image, np.ndarray):
-            raise ValueError("Invalid image provided to MRZScannerAdapter.")
-
         try:
-            # Convert to BGR for MRZScanner
-            bgr_img = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+            # Downscale large scans: preprocessing cost scales with pixel count
+            scale = 1.0
+            max_long_edge = self.max_long_edge
+            h, w = image.shape[:2]
+            if max_long_edge and max(h, w) > max_long_edge:
+                scale = max_long_edge / max(h, w)
+                image = cv2.resize(
+                    image,
+                    (max(1, round(w * scale)), max(1, round(h * scale))),
+                    interpolation=cv2.INTER_AREA,
+                )
+
+            # Cached URL images are shared and read-only; never hand those to the model directly
+            if not image.flags.writeable:
+                image = image.copy()
+
+            # Image is already BGR, which is what MRZScanner expects
             result = self.model(
-                bgr_img,
+                image,
                 do_center_crop=self.do_center_crop,
                 do_postprocess=self.do_postprocess,
             )
 
-            # Ensure expected structure
-            mrz_texts = result.get("mrz_texts", [])
+            # Ensure expected structure: mrz_texts is always a flat List[str]
+            mrz_texts = list(chain.from_iterable(
+                [item] if isinstance(item, str) else item
+                for item in result.get("mrz_texts", [])
+            ))
             polygon = result.get("mrz_polygon", None)
+            if polygon is not None and scale != 1.0:
+                # Report the polygon in the caller's (original) image coordinates
+                polygon = np.asarray(polygon) / scale
             msg = str(result.get("msg", "Unknown"))
 
             if not mrz_texts:
@@ -1,11 +1,20 @@
 # domain/logic/parser_adapter.py
 
 from abc import ABC, abstractmethod
+from datetime import date
 from typing import List, Dict, Any
 from passporteye.mrz.text import MRZ
 from utils.validators import normalize_field, convert_date, validate_mrz_fields, compute_overall_validity
 
 
+# PassportEye fields cleaned with normalize_field
+_STRING_FIELDS = ("type", "country", "number", "nationality", "sex",
+                  "names", "surname", "personal_number")
+
+# Date fields converted to YYYY-MM-DD, with their is_expiration flag
+_DATE_FIELDS = (("date_of_birth", False), ("expiration_date", True))
+
+
 # ----------------------------
 # 1. Abstract Interface
 # ----------------------------
@@ -35,9 +44,7 @@ class PassportEyeParser(BaseMRZParser):
     """Concrete parser using PassportEye library."""
 
     def parse(self, mrz_texts: List[str]) -> Dict[str, Any]:
-        if not mrz_texts or not isinstance(mrz_texts, list):
-            raise ValueError("MRZ texts must be a non-empty list of strings.")
-
+        # mrz_texts is a non-empty List[str]: the detector guarantees it and the service checks it
         try:
             # ----------------------------
             # Parse MRZ with PassportEye
@@ -55,20 +62,19 @@ class PassportEyeParser(BaseMRZParser):
             # ----------------------------
             # Normalize string fields
             # ----------------------------
-            string_fields = ["type", "country", "number", "nationality", "sex",
-                            "names", "surname", "personal_number"]
-            for field in string_fields:
-                if field in data:
-                    data[field] = normalize_field(data[field])
+            for field in _STRING_FIELDS:
+                value = data.get(field)
+                if value is not None:
+                    data[field] = normalize_field(value)
 
             # ----------------------------
             # Convert dates
             # ----------------------------
-            date_fields = ["date_of_birth", "expiration_date"]
-            for field in date_fields:
-                if field in data:
-                    is_expiration = field == "expiration_date"
-                    data[field] = convert_date(data[field], is_expiration=is_expiration)
+            today = date.today()
+            for field, is_expiration in _DATE_FIELDS:
+                value = data.get(field)
+                if value is not None:
+                    data[field] = convert_date(value, is_expiration=is_expiration, today=today)
 
             # Tunisia fix
             if data.get("country") == "TUN" and "personal_number" in data:
@@ -1,13 +1,24 @@
 # domain/logic/passport_service.py
 
-from typing import Optional, List
-from utils.image import load_image
+from typing import AsyncIterator, Optional, List
+import logging
+import numpy as np
+from utils.image import load_image, iter_images, decode_image
 from domain.logic.mrz_adapter import BaseMRZDetector, MRZScannerAdapter
 from domain.logic.parser_adapter import BaseMRZParser, PassportEyeParser
 from domain.models.mrz_data import MRZData
 from core.logging import logger
 
 
+# MRZData fields whose PassportEye key has a different name; all other keys match 1:1
+_FIELD_MAP = {
+    "document_type": "type",
+    "country_code": "country",
+    "passport_number": "number",
+    "given_names": "names",
+}
+
+
 class PassportService:
     """
     Core service that orchestrates MRZ detection, parsing, and validation.
@@ -30,15 +41,66 @@ class PassportService:
         """
         Process passport image from path, URL, or base64.
         """
-        # 1️⃣ Load image
-        image = load_image(source)
+        # 1️⃣ Load image (the single type check on the hot path; everything downstream trusts it)
+        image = load_image(source, **self._decode_options())
+        if not isinstance(image, np.ndarray):
+            raise ValueError("Could not load an image from the provided source.")
+        return self.process_image(image)
+
+    def process_passport_bytes(self, buf: bytes) -> MRZData:
+        """
+        Process passport image from raw encoded bytes (e.g. an upload), without touching disk.
+        """
+        # 1️⃣ Decode image in memory
+        image = decode_image(buf, **self._decode_options())
+        return self.process_image(image)
 
+    def process_passport_batch(self, buffers: List[bytes]) -> List[MRZData]:
+        """
+        Process several passport images from raw encoded bytes, returning results in input order.
+        Each image is decoded and detected before the next one is decoded, so at most one
+        full frame is held in memory at a time. A failure names the image's (0-based) index.
+        """
+        results: List[MRZData] = []
+        try:
+            for buf in buffers:
+                results.append(self.process_passport_bytes(buf))
+        except ValueError as e:
+            raise ValueError(f"Image {len(results)}: {e}") from e
+        return results
+
+    def iter_sources(self, sources: List[str]) -> AsyncIterator[np.ndarray]:
+        """
+        Load several image sources in input order, fetching the next few while the
+        current image is being detected.
+        """
+        return iter_images(sources, **self._decode_options())
+
+    def process_image(self, image: np.ndarray) -> MRZData:
+        """
+        Run detection, parsing and validation on a decoded image.
+        """
         # 2️⃣ Detect MRZ lines
-        detection_result = self.detector.detect(image)
+        return self._build_mrz_data(self.detector.detect(image))
+
+    def _decode_options(self) -> dict:
+        """
+        Decoder settings taken from the detector: reuse its TurboJPEG handle (if it has one)
+        and let JPEG decoding already shrink the image towards the detector's input size.
+        """
+        return {
+            "jpeg": getattr(self.detector, "jpeg", None),
+            "max_long_edge": getattr(self.detector, "max_long_edge", None),
+        }
+
+    def _build_mrz_data(self, detection_result: dict) -> MRZData:
+        """
+        Parse and validate one detector result into an MRZData model.
+        """
         mrz_texts: List[str] = detection_result.get("mrz_texts", [])
         
         # ✅ LOG THE DETECTED MRZ
-        logger.info(f"Detected MRZ lines: {mrz_texts}")
+        logger.debug("Detected MRZ lines: %s", mrz_texts)
         
         if not mrz_texts:
             raise ValueError(f"No MRZ lines detected. Msg: {detection_result.get('msg')}")
@@ -46,41 +108,15 @@ class PassportService:
         # 3️⃣ Parse MRZ lines
         try:
             parsed_data = self.parser.parse(mrz_texts)
-            logger.info(f"Parsed data keys: {list(parsed_data.keys())}")  # ✅ Debug
-            # ✅ ADD THIS - Log the actual 'type' value
-            logger.info(f"Type field value: {parsed_data.get('type')}")
-            logger.info(f"Type field type: {type(parsed_data.get('type'))}")
+            logger.debug("Parsed MRZ data: keys=%s type=%s", list(parsed_data), parsed_data.get("type"))
         except ValueError as e:
-            logger.error(f"Parsing failed: {e}")
+            logger.error("Parsing failed: %s", e)
             raise ValueError("Image does not contain a valid passport MRZ. Please try another image.")
         # 4️⃣ Convert to MRZData model (enforces typing + normalization)
-        mrz_data = MRZData(
-            mrz_texts=mrz_texts,
-            mrz_type=parsed_data.get("mrz_type"),
-            valid_score=parsed_data.get("valid_score"),
-            document_type=parsed_data.get("type"),
-            country_code=parsed_data.get("country"),
-            passport_number=parsed_data.get("number"),
-            date_of_birth=parsed_data.get("date_of_birth"),
-            expiration_date=parsed_data.get("expiration_date"),
-            nationality=parsed_data.get("nationality"),
-            sex=parsed_data.get("sex"),
-            given_names=parsed_data.get("names"),
-            surname=parsed_data.get("surname"),
-            personal_number=parsed_data.get("personal_number"),
-            check_number=parsed_data.get("check_number"),
-            check_date_of_birth=parsed_data.get("check_date_of_birth"),
-            check_expiration_date=parsed_data.get("check_expiration_date"),
-            check_composite=parsed_data.get("check_composite"),
-            check_personal_number=parsed_data.get("check_personal_number"),
-            valid_number=parsed_data.get("valid_number"),
-            valid_date_of_birth=parsed_data.get("valid_date_of_birth"),
-            valid_expiration_date=parsed_data.get("valid_expiration_date"),
-            valid_composite=parsed_data.get("valid_composite"),
-            valid_personal_number=parsed_data.get("valid_personal_number"),
-            is_valid=parsed_data.get("is_valid"),
-        )
-        logger.info(f"MRZData dict: {mrz_data.dict()}")
+        renamed = {field: parsed_data.get(key) for field, key in _FIELD_MAP.items()}
+        mrz_data = MRZData.model_validate({**parsed_data, **renamed, "mrz_texts": mrz_texts})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("MRZData dict: %s", mrz_data.model_dump())
 
         return mrz_data
 
@@ -1,9 +1,14 @@
-from pydantic import BaseModel, Field, validator, field_validator
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
 from typing import Optional, List
-from utils.validators import convert_date 
+from utils.validators import convert_date
+
+# Translation table that drops MRZ filler characters in a single C-level pass
+_FILLER_TABLE = str.maketrans("", "", "<")
+
 
 class MRZData(BaseModel):
+    model_config = ConfigDict(from_attributes=True, str_strip_whitespace=True, validate_default=False)
+
     # --- Raw MRZ text from detection ---
     mrz_texts: List[str] = Field(..., description="Raw MRZ lines extracted from image")
 
@@ -36,6 +41,7 @@ class MRZData(BaseModel):
     valid_score: Optional[int] = Field(None, description="Overall MRZ parsing confidence score")
 
     # --- Derived field ---
+    # Computed by the parser (compute_overall_validity); taken as-is
     is_valid: Optional[bool] = Field(default=None, description="True if all validations pass")
 
 
@@ -43,17 +49,17 @@ class MRZData(BaseModel):
     # Validators / Normalizers
     # -----------------------------
 
-    @validator(
+    @field_validator(
         "document_type", "country_code", "nationality", "given_names", "surname", "personal_number", "passport_number",
-        pre=True, always=True
+        mode="before"
     )
     def clean_strings(cls, v):
         if v is None:
             return v
-        return v.replace("<", "").strip().upper()
+        return v.translate(_FILLER_TABLE).strip().upper()
 
     @field_validator("date_of_birth", "expiration_date", mode="before")
-    def format_dates(cls, v, info):
+    def format_dates(cls, v, info: ValidationInfo):
         """Convert YYMMDD → YYYY-MM-DD with correct century."""
         if not v:
             return None
@@ -62,58 +68,8 @@ class MRZData(BaseModel):
             if len(v) == 10 and "-" in v:
                 return v
 
-            if len(v) == 6 and v.isdigit():
-                yy = int(v[:2])
-                mm = int(v[2:4])
-                dd = int(v[4:6])
-                today = datetime.today()
-
-                field_name = info.name
-
-                if field_name == "date_of_birth":
-                    # Make sure age <= 120
-                    century = 1900 if yy > today.year % 100 else 2000
-                    year = century + yy
-                    if today.year - year > 120:
-                        year -= 100
-                    return datetime(year, mm, dd).strftime("%Y-%m-%d")
-
-                elif field_name == "expiration_date":
-                    # Make sure passport expiration is close to today
-                    # Assume passports valid <= 20 years
-                    # pick century so that date is nearest to today
-                    year_2000 = 2000 + yy
-                    year_1900 = 1900 + yy
-
-                    date_2000 = datetime(year_2000, mm, dd)
-                    date_1900 = datetime(year_1900, mm, dd)
-
-                    # Choose the date closest to today but in the future
-                    if abs((date_2000 - today).days) <= abs((date_1900 - today).days):
-                        year = year_2000
-                    else:
-                        year = year_1900
-
-                    return datetime(year, mm, dd).strftime("%Y-%m-%d")
+            # Same century rules as the parser (utils.validators.convert_date)
+            return convert_date(v, is_expiration=info.field_name == "expiration_date")
 
         except Exception:
             return None
-
-        return None
-    @validator("is_valid", always=True)
-    def compute_is_valid(cls, v, values):
-        """Mark passport valid only if all validation flags are True."""
-        flags = [
-            values.get("valid_number"),
-            values.get("valid_date_of_birth"),
-            values.get("valid_expiration_date"),
-            values.get("valid_composite"),
-            values.get("valid_personal_number"),
-        ]
-        # only consider those that are not None
-        active_flags = [f for f in flags if f is not None]
-        return all(active_flags) if active_flags else False
-
-    class Config:
-        orm_mode = True
-        anystr_strip_whitespace = True
\ No newline at end of file
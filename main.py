@@ -3,9 +3,13 @@ import os
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from anyio import to_thread
+from starlette.formparsers import MultiPartParser
 from turbojpeg import TurboJPEG
 from core.logging import setup_logger
 from app.api.v4.endpoints import passport
+from app.api.v4.deps import build_mrz_detector, get_mrz_parser
+from utils.image import close_session, close_aio_session
 from prometheus_fastapi_instrumentator import Instrumentator
 
 # ------------------------------------------------
@@ -48,6 +52,12 @@ app = FastAPI(
     version=os.getenv("APP_VERSION", "1.0.0"),
     description="API to extract and validate MRZ data from passport images"
 )
+# Single TurboJPEG handle shared by the MRZ detector and image decoding
+app.state.jpeg = jpeg
+
+# Keep typical passport scans in memory while the multipart body is parsed;
+# only uploads larger than this spill to a temp file on disk (starlette default: 1 MB)
+MultiPartParser.spool_max_size = int(os.getenv("UPLOAD_SPOOL_MAX_SIZE", 8 * 1024 * 1024))
 Instrumentator().instrument(app).expose(app)
 # ------------------------------------------------
 # 5️⃣ Configure CORS (adjust for production)
@@ -72,10 +82,24 @@ app.include_router(passport.router)
 async def startup_event():
     logger.info("Passport MRZ API is starting...")
 
+    # MRZ inference runs in anyio's worker threads (run_in_threadpool).
+    # OpenCV, TurboJPEG and ONNX Runtime release the GIL inside their native
+    # code, so requests really do run in parallel across these threads.
+    threadpool_size = int(os.getenv("THREADPOOL_SIZE", (os.cpu_count() or 1) * 2))
+    to_thread.current_default_thread_limiter().total_tokens = threadpool_size
+    logger.info(f"Worker threadpool size set to {threadpool_size}")
+
+    # Load the MRZ model once up front so the first request doesn't pay for it
+    await to_thread.run_sync(build_mrz_detector, app.state.jpeg)
+    get_mrz_parser()
+    logger.info("MRZ detector and parser initialized")
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Passport MRZ API is shutting down...")
+    close_session()
+    await close_aio_session()
 
 # ------------------------------------------------
 # 8️⃣ Entry point for uvicorn
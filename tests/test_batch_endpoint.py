@@ -0,0 +1,104 @@
+# test_batch_endpoint.py
+import base64
+
+import cv2
+import numpy as np
+import pytest
+
+try:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from starlette import formparsers
+
+    from app.api.v4.deps import get_passport_service
+    from app.api.v4.endpoints import passport as passport_endpoint
+    from domain.logic.passport_service import PassportService
+except (ImportError, RuntimeError) as e:  # mrzscanner raises RuntimeError without the native libturbojpeg
+    pytest.skip(f"API dependencies unavailable: {e}", allow_module_level=True)
+
+
+class _Detector:
+    """Reads the 'passport number' from the image's pixel value; 0 means no MRZ found."""
+
+    def detect(self, image):
+        value = int(image[0, 0, 0])
+        return {"mrz_texts": [f"P<{value}"] if value else [], "msg": "no MRZ"}
+
+
+class _Parser:
+    def parse(self, mrz_texts):
+        return {"number": mrz_texts[0][2:]}
+
+
+def _png(value: int) -> bytes:
+    return cv2.imencode(".png", np.full((8, 8, 3), value, np.uint8))[1].tobytes()
+
+
+def _data_uri(value: int) -> str:
+    return "data:image/png;base64," + base64.b64encode(_png(value)).decode()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(passport_endpoint, "MAX_BATCH_SIZE", 3)
+    app = FastAPI()
+    app.include_router(passport_endpoint.router)
+    app.dependency_overrides[get_passport_service] = lambda: PassportService(_Detector(), _Parser())
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _files(*values):
+    return [("files", (f"{i}.png", _png(v), "image/png")) for i, v in enumerate(values)]
+
+
+def test_files_are_returned_in_input_order(client):
+    response = client.post("/v4/validate_batch", files=_files(30, 10, 20))
+    assert response.status_code == 200
+    assert [item["passport_number"] for item in response.json()] == ["30", "10", "20"]
+
+
+def test_sources_are_returned_in_input_order(client):
+    response = client.post(
+        "/v4/validate_batch",
+        data={"sources": [_data_uri(30), _data_uri(10), _data_uri(20)]},
+    )
+    assert response.status_code == 200
+    assert [item["passport_number"] for item in response.json()] == ["30", "10", "20"]
+
+
+@pytest.mark.parametrize("field", ["files", "sources"])
+def test_oversized_batch_is_rejected_with_413(client, field):
+    if field == "files":
+        response = client.post("/v4/validate_batch", files=_files(1, 2, 3, 4))
+    else:
+        response = client.post("/v4/validate_batch", data={"sources": [_data_uri(v) for v in (1, 2, 3, 4)]})
+    assert response.status_code == 413
+    assert "limit is 3" in response.json()["detail"]
+
+
+def test_file_limit_is_enforced_while_parsing(client, monkeypatch):
+    # The parser stops at the first surplus file instead of spooling all of them
+    spooled = []
+    spool = formparsers.SpooledTemporaryFile
+    monkeypatch.setattr(formparsers, "SpooledTemporaryFile", lambda *a, **kw: spooled.append(1) or spool(*a, **kw))
+    response = client.post("/v4/validate_batch", files=_files(*range(1, 20)))
+    assert response.status_code == 413
+    assert len(spooled) == 3
+
+
+def test_failing_image_reports_its_index(client):
+    response = client.post("/v4/validate_batch", files=_files(30, 0, 20))
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Image 1: No MRZ lines detected")
+
+    response = client.post("/v4/validate_batch", data={"sources": [_data_uri(30), _data_uri(20), _data_uri(0)]})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Image 2: No MRZ lines detected")
+
+
+def test_non_image_upload_reports_its_index(client):
+    files = _files(30) + [("files", ("notes.txt", b"not an image", "text/plain"))]
+    response = client.post("/v4/validate_batch", files=files)
+    assert response.status_code == 415
+    assert response.json()["detail"].startswith("Image 1: ")
@@ -0,0 +1,254 @@
+# test_image.py
+import asyncio
+import base64
+import http.server
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import utils.image as image_utils
+from utils.image import decode_image
+
+
+class _TurboJPEGLike:
+    """Stands in for TurboJPEG: decodes like libjpeg-turbo, i.e. ignoring EXIF orientation."""
+
+    def decode_header(self, buf):
+        h, w = cv2.imdecode(np.frombuffer(buf, np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION).shape[:2]
+        return w, h, None, None
+
+    def decode(self, buf, pixel_format=None, scaling_factor=None):
+        return cv2.imdecode(np.frombuffer(buf, np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+
+
+def _jpeg_with_orientation(img: np.ndarray, orientation: int, byte_order: bytes = b"MM") -> bytes:
+    """Encode img as JPEG and insert an APP1 Exif segment carrying the given Orientation tag."""
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 100])
+    assert ok
+    order = "big" if byte_order == b"MM" else "little"
+    tiff = (
+        byte_order + (42).to_bytes(2, order) + (8).to_bytes(4, order)
+        + (1).to_bytes(2, order)  # one IFD0 entry
+        + (0x0112).to_bytes(2, order) + (3).to_bytes(2, order) + (1).to_bytes(4, order)
+        + orientation.to_bytes(2, order) + b"\x00\x00"
+        + (0).to_bytes(4, order)  # no next IFD
+    )
+    payload = b"Exif\x00\x00" + tiff
+    app1 = b"\xff\xe1" + (len(payload) + 2).to_bytes(2, "big") + payload
+    data = encoded.tobytes()
+    return data[:2] + app1 + data[2:]
+
+
+@pytest.fixture
+def image():
+    # Distinct quadrants so every rotation/flip gives a different array
+    img = np.zeros((100, 200, 3), np.uint8)
+    img[:50, :100] = (255, 0, 0)
+    img[:50, 100:] = (0, 255, 0)
+    img[50:, :100] = (0, 0, 255)
+    img[50:, 100:] = (255, 255, 255)
+    return img
+
+
+def test_orientation_6_is_rotated_upright(image):
+    buf = _jpeg_with_orientation(image, 6)
+    out = decode_image(buf, jpeg=_TurboJPEGLike())
+    assert out.shape == (200, 100, 3)
+    assert out.shape == cv2.imdecode(np.frombuffer(buf, np.uint8), cv2.IMREAD_COLOR).shape
+
+
+@pytest.mark.parametrize("orientation", range(1, 9))
+@pytest.mark.parametrize("byte_order", [b"MM", b"II"])
+def test_turbojpeg_path_matches_opencv_orientation(image, orientation, byte_order):
+    buf = _jpeg_with_orientation(image, orientation, byte_order)
+    expected = cv2.imdecode(np.frombuffer(buf, np.uint8), cv2.IMREAD_COLOR)
+    out = decode_image(buf, jpeg=_TurboJPEGLike())
+    assert out.shape == expected.shape
+    assert np.abs(out.astype(int) - expected.astype(int)).max() <= 2
+
+
+# ----------------------------
+# Local HTTP server for the URL loaders
+# ----------------------------
+
+class _ImageServer:
+    """Serves PNGs on 127.0.0.1; `responses[path]` builds (status, headers, body) from request headers."""
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []  # (path, request headers) in arrival order
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                status, headers, body = server.responses[self.path](self.headers)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}{path}"
+
+    def serve_png(self, path: str, img: np.ndarray, headers: dict = None) -> None:
+        body = cv2.imencode(".png", img)[1].tobytes()
+        self.responses[path] = lambda request_headers: (200, dict(headers or {}), body)
+
+
+@pytest.fixture
+def server():
+    srv = _ImageServer()
+    yield srv
+    srv.httpd.shutdown()
+
+
+def test_url_session_does_not_keep_cookies(server, image):
+    # Cookies set while fetching one client's URL must not be sent on another client's fetch
+    server.serve_png("/a.png", image, {"Set-Cookie": "session=client-a; Path=/"})
+    image_utils.load_image_from_url(server.url("/a.png"))
+    image_utils.load_image_from_url(server.url("/a.png"))
+    assert [headers.get("Cookie") for _, headers in server.requests] == [None, None]
+
+
+# ----------------------------
+# URL cache
+# ----------------------------
+
+@pytest.fixture
+def url_cache(monkeypatch):
+    """Enable the (off by default) URL cache with a 1 MiB budget and 100 kB entry limit."""
+    cache = image_utils.LRUCache(maxsize=1024 * 1024, getsizeof=lambda entry: entry[2].nbytes)
+    monkeypatch.setattr(image_utils, "_URL_CACHE", cache)
+    monkeypatch.setattr(image_utils, "URL_CACHE_MAX_ENTRY_BYTES", 100_000)
+    return cache
+
+
+def _serve_with_etag(server, path, img, etag='"v1"'):
+    body = cv2.imencode(".png", img)[1].tobytes()
+
+    def respond(request_headers):
+        if request_headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag}, body
+
+    server.responses[path] = respond
+
+
+def test_url_cache_is_disabled_by_default(server, image):
+    assert image_utils.URL_CACHE_BYTES == 0 and image_utils._URL_CACHE is None
+    _serve_with_etag(server, "/a.png", image)
+    first = image_utils.load_image_from_url(server.url("/a.png"))
+    second = image_utils.load_image_from_url(server.url("/a.png"))
+    assert first is not second and first.flags.writeable
+    assert all("If-None-Match" not in headers for _, headers in server.requests)
+
+
+def test_url_cache_stores_on_200_and_serves_304(server, url_cache, image):
+    _serve_with_etag(server, "/a.png", image)
+    first = image_utils.load_image_from_url(server.url("/a.png"))
+    assert len(url_cache) == 1 and not first.flags.writeable
+
+    second = image_utils.load_image_from_url(server.url("/a.png"))
+    assert second is first
+    assert server.requests[1][1].get("If-None-Match") == '"v1"'
+    np.testing.assert_array_equal(second, image)
+
+
+def test_url_cache_skips_responses_without_validators(server, url_cache, image):
+    server.serve_png("/a.png", image)
+    img = image_utils.load_image_from_url(server.url("/a.png"))
+    assert len(url_cache) == 0 and img.flags.writeable
+
+
+def test_url_cache_skips_oversized_entries(server, url_cache):
+    big = np.zeros((200, 200, 3), np.uint8)  # 120 kB decoded > 100 kB entry limit
+    _serve_with_etag(server, "/big.png", big)
+    image_utils.load_image_from_url(server.url("/big.png"))
+    image_utils.load_image_from_url(server.url("/big.png"))
+    assert len(url_cache) == 0
+    assert all("If-None-Match" not in headers for _, headers in server.requests)
+
+
+# ----------------------------
+# Async batch loader
+# ----------------------------
+
+def _iter_all(sources, **kwargs):
+    """Drain iter_images on a fresh event loop (closing the loop-bound aiohttp session after)."""
+    async def run():
+        try:
+            return [img async for img in image_utils.iter_images(sources, **kwargs)]
+        finally:
+            await image_utils.close_aio_session()
+    return asyncio.run(run())
+
+
+def test_iter_images_keeps_input_order(server, image, tmp_path):
+    # The first download is the slowest, yet every image comes back in input order
+    variants = [np.roll(image, 10 * i, axis=1) for i in range(4)]
+    slow = cv2.imencode(".png", variants[0])[1].tobytes()
+
+    def respond_slowly(request_headers):
+        time.sleep(0.3)
+        return 200, {}, slow
+
+    server.responses["/slow.png"] = respond_slowly
+    server.serve_png("/fast.png", variants[1])
+    path = tmp_path / "local.png"
+    cv2.imwrite(str(path), variants[2])
+    b64 = "data:image/png;base64," + base64.b64encode(cv2.imencode(".png", variants[3])[1]).decode()
+
+    images = _iter_all([server.url("/slow.png"), server.url("/fast.png"), str(path), b64])
+    assert len(images) == 4
+    for got, expected in zip(images, variants):
+        np.testing.assert_array_equal(got, expected)
+
+
+def test_iter_images_loads_at_most_window_ahead(server, image):
+    for name in "abc":
+        server.serve_png(f"/{name}.png", image)
+
+    async def run():
+        try:
+            images = image_utils.iter_images([server.url(f"/{n}.png") for n in "abc"], window=1)
+            await images.__anext__()
+            requested = [path for path, _ in server.requests]
+            await images.aclose()
+            return requested
+        finally:
+            await image_utils.close_aio_session()
+
+    assert "/c.png" not in asyncio.run(run())
+
+
+def test_iter_images_raises_first_failure_in_order(server, image):
+    server.serve_png("/ok.png", image)
+    server.responses["/missing.png"] = lambda request_headers: (404, {}, b"")
+
+    async def run():
+        loaded = []
+        try:
+            with pytest.raises(ValueError, match="/missing.png"):
+                async for img in image_utils.iter_images(
+                    [server.url("/ok.png"), server.url("/missing.png"), server.url("/ok.png")]
+                ):
+                    loaded.append(img)
+        finally:
+            await image_utils.close_aio_session()
+        return loaded
+
+    loaded = asyncio.run(run())
+    assert len(loaded) == 1
+    np.testing.assert_array_equal(loaded[0], image)
@@ -0,0 +1,32 @@
+# test_mrz_data.py
+from datetime import date
+
+import pytest
+
+import utils.validators as validators
+from domain.models.mrz_data import MRZData
+from utils.validators import EXP_WINDOW, convert_date
+
+
+@pytest.mark.parametrize("today", [date(2026, 10, 15), date(2049, 6, 30), date(2000, 1, 1)], ids=str)
+def test_format_dates_uses_convert_date_rules(monkeypatch, today):
+    class _FixedDate(date):
+        @classmethod
+        def today(cls):
+            return today
+
+    monkeypatch.setattr(validators, "date", _FixedDate)
+    # Includes the EXP_WINDOW boundary year, where the rules used to disagree
+    boundary_yy = (today.year + EXP_WINDOW) % 100
+    for yy in sorted({0, 25, 49, 50, 75, 99, boundary_yy}):
+        for mmdd in ("0101", "0615", "1231"):
+            value = f"{yy:02d}{mmdd}"
+            model = MRZData(mrz_texts=[], date_of_birth=value, expiration_date=value)
+            assert model.expiration_date == convert_date(value, is_expiration=True, today=today)
+            assert model.date_of_birth == convert_date(value, today=today)
+
+
+def test_format_dates_keeps_iso_and_rejects_invalid():
+    model = MRZData(mrz_texts=[], date_of_birth="1974-08-12", expiration_date="120231")
+    assert model.date_of_birth == "1974-08-12"
+    assert model.expiration_date is None
@@ -0,0 +1,144 @@
+# test_validators.py
+import random
+import string
+from datetime import date
+
+import pytest
+
+from utils import validators
+from utils.validators import EXP_WINDOW, char_value, convert_date, validate_mrz_fields
+
+
+def _closest_century(yy: int, mm: int, dd: int, today: date) -> int:
+    """Previous rule: the century whose date lies nearest to today (ties go to 2000)."""
+    date_2000 = date(2000 + yy, mm, dd)
+    date_1900 = date(1900 + yy, mm, dd)
+    if abs((date_2000 - today).days) <= abs((date_1900 - today).days):
+        return 2000 + yy
+    return 1900 + yy
+
+
+# Reference days spread over 2000-2099 (one per year), plus a few edge days
+TODAYS = [date(2000 + i, 1 + (i * 5) % 12, 1 + (i * 7) % 28) for i in range(100)]
+TODAYS += [date(2000, 1, 1), date(2024, 12, 31), date(2049, 6, 30), date(2099, 12, 31)]
+
+
+@pytest.mark.parametrize("today", TODAYS, ids=str)
+def test_expiration_century_matches_closest_date_rule(today):
+    for yy in range(100):
+        # Within EXP_WINDOW's boundary year the old rule also depends on month/day
+        if 2000 + yy == today.year + EXP_WINDOW:
+            continue
+        for mm, dd in ((1, 1), (6, 15), (12, 31)):
+            expected = date(_closest_century(yy, mm, dd, today), mm, dd).isoformat()
+            assert convert_date(f"{yy:02d}{mm:02d}{dd:02d}", is_expiration=True, today=today) == expected
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("300101", "2030-01-01"),
+        ("760101", "2076-01-01"),
+        ("770101", "1977-01-01"),
+        ("991231", "1999-12-31"),
+        ("250230", None),
+        ("2501", None),
+    ],
+)
+def test_expiration_examples(value, expected):
+    assert convert_date(value, is_expiration=True, today=date(2026, 10, 15)) == expected
+
+
+# ICAO 9303 TD3 specimen: L898902C36UTO7408122F1204159ZE184226B<<<<<10
+SPECIMEN = {
+    "passport_number": "L898902C3",
+    "check_number": "6",
+    "date_of_birth": "740812",
+    "check_date_of_birth": "2",
+    "expiration_date": "120415",
+    "check_expiration_date": "9",
+    "personal_number": "ZE184226B<<<<<",
+    "check_personal_number": "1",
+    "check_composite": "0",
+}
+
+
+def test_specimen_with_fillers_is_valid():
+    assert all(validate_mrz_fields(SPECIMEN).values())
+
+
+def test_specimen_without_fillers_is_valid():
+    # Stripped trailing '<' fillers keep their (zero-valued) positions in the composite field
+    flags = validate_mrz_fields(dict(SPECIMEN, personal_number="ZE184226B"))
+    assert all(flags.values())
+
+
+@pytest.mark.parametrize(
+    "changes, invalid",
+    [
+        ({"check_composite": None}, {"valid_composite"}),
+        ({"check_composite": "X"}, {"valid_composite"}),
+        ({"check_composite": "²"}, {"valid_composite"}),
+        ({"check_composite": "1"}, {"valid_composite"}),
+        ({"passport_number": None}, {"valid_number", "valid_composite"}),
+        ({"check_number": ""}, {"valid_number", "valid_composite"}),
+        ({"personal_number": None, "check_personal_number": None}, {"valid_personal_number", "valid_composite"}),
+        ({"expiration_date": "120416"}, {"valid_expiration_date", "valid_composite"}),
+    ],
+)
+def test_specimen_missing_or_wrong_fields(changes, invalid):
+    data = {key: value for key, value in dict(SPECIMEN, **changes).items() if value is not None}
+    flags = validate_mrz_fields(data)
+    assert {name for name, ok in flags.items() if not ok} == invalid
+
+
+def test_no_fields_is_invalid():
+    assert not any(validate_mrz_fields({}).values())
+    assert not any(validate_mrz_fields({"check_composite": "0"}).values())
+
+
+def _reference_flags(data):
+    """Per-character ICAO reference: checksums via char_value, composite fields '<'-padded to TD3 widths."""
+    def checksum(text):
+        return sum(char_value(ch) * (7, 3, 1)[i % 3] for i, ch in enumerate(text)) % 10
+
+    def check(value, digit):
+        return bool(value) and bool(digit) and digit.isdecimal() and checksum(value) == int(digit)
+
+    composite_parts = [
+        (data.get(key) or "")[:width].ljust(width, "<")
+        for key, width in (("passport_number", 9), ("check_number", 1), ("date_of_birth", 6),
+                           ("check_date_of_birth", 1), ("expiration_date", 6), ("check_expiration_date", 1),
+                           ("personal_number", 14), ("check_personal_number", 1))
+    ]
+    has_any = any(data.get(key) for key in ("passport_number", "check_number", "date_of_birth",
+                                            "check_date_of_birth", "expiration_date", "check_expiration_date",
+                                            "personal_number", "check_personal_number"))
+    return {
+        "valid_number": check(data.get("passport_number"), data.get("check_number")),
+        "valid_date_of_birth": check(data.get("date_of_birth"), data.get("check_date_of_birth")),
+        "valid_expiration_date": check(data.get("expiration_date"), data.get("check_expiration_date")),
+        "valid_personal_number": check(data.get("personal_number"), data.get("check_personal_number")),
+        "valid_composite": has_any and check("".join(composite_parts), data.get("check_composite")),
+    }
+
+
+@pytest.mark.parametrize("use_numba", [True, False], ids=["numba", "fallback"])
+def test_validate_mrz_fields_matches_reference_on_random_input(monkeypatch, use_numba):
+    if not use_numba:
+        monkeypatch.setattr(validators, "_checksum_kernel", None)
+    elif validators._checksum_kernel is None:
+        pytest.skip("numba not installed")
+    rng = random.Random(9303)
+    alphabet = string.ascii_uppercase + string.digits + "<"
+    widths = {"passport_number": 9, "date_of_birth": 6, "expiration_date": 6, "personal_number": 14}
+    for _ in range(2000):
+        data = {}
+        for key, width in widths.items():
+            if rng.random() > 0.1:
+                data[key] = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, width)))
+        for key in ("check_number", "check_date_of_birth", "check_expiration_date",
+                    "check_personal_number", "check_composite"):
+            if rng.random() > 0.1:
+                data[key] = rng.choice(["", "X", "²"]) if rng.random() < 0.1 else str(rng.randint(0, 9))
+        assert validate_mrz_fields(data) == _reference_flags(data), data
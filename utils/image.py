@@ -1,41 +1,163 @@
 # utils/image.py
+#
+# All image I/O goes through OpenCV (cv2.imdecode) and libjpeg-turbo (TurboJPEG);
+# Pillow is not imported anywhere on the loading path.
 
+import asyncio
+import http.cookiejar
+import os
+import threading
 import cv2
-import base64
+import binascii
+from collections import deque
+from itertools import islice
+import aiohttp
 import numpy as np
 import requests
-from io import BytesIO
-from typing import Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cachetools import LRUCache
+from typing import AsyncIterator, Deque, Dict, List, Optional, Tuple, Union
 from pathlib import Path
-from PIL import Image
+from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_RGB
 
 
 # ----------------------------
 # 1. Load Image from Local Path
 # ----------------------------
 
-def load_image_from_path(path: Union[str, Path]) -> np.ndarray:
-    """Load image from a local file path."""
+def load_image_from_path(
+    path: Union[str, Path],
+    jpeg: Optional[TurboJPEG] = None,
+    max_long_edge: Optional[int] = None,
+    as_rgb: bool = False,
+) -> np.ndarray:
+    """
+    Load image from a local file path and return as BGR numpy array (RGB if as_rgb).
+    JPEG files are decoded with TurboJPEG when a handle is given (see decode_image).
+    """
     path = Path(path)
-    if not path.exists():
+    try:
+        # Open directly instead of exists() + open: one syscall, no stat/open race
+        buf = path.read_bytes()
+    except FileNotFoundError:
         raise FileNotFoundError(f"Image path not found: {path}")
-    img = cv2.imread(str(path))
-    if img is None:
-        raise ValueError(f"Could not read image from path: {path}")
-    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    try:
+        return decode_image(buf, jpeg=jpeg, max_long_edge=max_long_edge, as_rgb=as_rgb)
+    except ValueError as e:
+        raise ValueError(f"Could not read image from path: {path} ({e})")
 
 
 # ----------------------------
 # 2. Load Image from URL
 # ----------------------------
 
-def load_image_from_url(url: str, timeout: int = 10) -> np.ndarray:
-    """Load image from a remote URL and return as RGB numpy array."""
+# Shared HTTP session: keep-alive connections to image hosts are pooled and reused,
+# so repeated fetches skip the TCP + TLS handshake.
+# URLs come from clients, so the session must not carry state between them: no cookies are stored.
+_SESSION = requests.Session()
+_SESSION.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.2),
+)
+_SESSION.mount("https://", _HTTP_ADAPTER)
+_SESSION.mount("http://", _HTTP_ADAPTER)
+
+
+# Largest accepted remote image; bigger downloads are aborted before decoding
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", 20 * 1024 * 1024))
+_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def close_session() -> None:
+    """Close the pooled HTTP connections (call on application shutdown)."""
+    _SESSION.close()
+
+
+# Optional cache of decoded images of recently fetched URLs, keyed by (url, max_long_edge, as_rgb).
+# Off by default (URL_CACHE_BYTES=0): URLs sent to this API are normally one-off passport scans,
+# and caching them only keeps personal data in worker memory. Enable it for shared reference images.
+# Entries are (etag, last_modified, read-only array) and are revalidated with a conditional GET.
+# The cache is bounded by decoded pixel bytes, not entry count; larger images are never cached.
+URL_CACHE_BYTES = int(os.getenv("URL_CACHE_BYTES", 0))
+URL_CACHE_MAX_ENTRY_BYTES = min(int(os.getenv("URL_CACHE_MAX_ENTRY_BYTES", 16 * 1024 * 1024)), URL_CACHE_BYTES)
+_URL_CACHE: Optional[LRUCache] = (
+    LRUCache(maxsize=URL_CACHE_BYTES, getsizeof=lambda entry: entry[2].nbytes) if URL_CACHE_BYTES > 0 else None
+)
+_URL_CACHE_LOCK = threading.Lock()
+
+
+def _url_cache_lookup(key: Tuple) -> Tuple[Optional[Tuple], Dict[str, str]]:
+    """Return the cached entry for key (or None) and the conditional-GET headers to send."""
+    if _URL_CACHE is None:
+        return None, {}
+    with _URL_CACHE_LOCK:
+        entry = _URL_CACHE.get(key)
+    headers = {}
+    if entry is not None:
+        etag, last_modified, _ = entry
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    return entry, headers
+
+
+def _url_cache_store(key: Tuple, response_headers, img: np.ndarray) -> np.ndarray:
+    """
+    Cache img when the response carries a validator (ETag / Last-Modified) and the decoded
+    array fits URL_CACHE_MAX_ENTRY_BYTES; returns img.
+    """
+    if _URL_CACHE is None:
+        return img
+    etag = response_headers.get("ETag")
+    last_modified = response_headers.get("Last-Modified")
+    if (etag or last_modified) and img.nbytes <= URL_CACHE_MAX_ENTRY_BYTES:
+        # Shared between requests: make it read-only so no caller can modify the cached pixels
+        img.setflags(write=False)
+        with _URL_CACHE_LOCK:
+            _URL_CACHE[key] = (etag, last_modified, img)
+    return img
+
+
+def _check_content_length(content_length: Optional[str], max_bytes: int) -> None:
+    """Reject a download up front when the server announces a body larger than max_bytes."""
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise ValueError(f"Image exceeds {max_bytes} bytes (Content-Length: {content_length})")
+
+
+def load_image_from_url(
+    url: str,
+    timeout: int = 10,
+    jpeg: Optional[TurboJPEG] = None,
+    max_long_edge: Optional[int] = None,
+    max_bytes: int = MAX_IMAGE_BYTES,
+    as_rgb: bool = False,
+) -> np.ndarray:
+    """
+    Load image from a remote URL and return as BGR numpy array (RGB if as_rgb).
+    The body is streamed into a single buffer and aborted once it exceeds max_bytes.
+    If the URL cache is enabled, images served with an ETag / Last-Modified are cached
+    (read-only) and revalidated with a conditional GET; a 304 skips the download and decode.
+    """
+    key = (url, max_long_edge, as_rgb)
+    entry, headers = _url_cache_lookup(key)
     try:
-        response = requests.get(url, timeout=timeout)
-        response.raise_for_status()
-        image = Image.open(BytesIO(response.content)).convert("RGB")
-        return np.array(image)
+        with _SESSION.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and entry is not None:
+                return entry[2]
+            response.raise_for_status()
+            _check_content_length(response.headers.get("Content-Length"), max_bytes)
+            buf = bytearray()
+            for chunk in response.iter_content(_DOWNLOAD_CHUNK_SIZE):
+                buf.extend(chunk)
+                if len(buf) > max_bytes:
+                    raise ValueError(f"Image exceeds {max_bytes} bytes")
+            response_headers = response.headers
+        img = decode_image(buf, jpeg=jpeg, max_long_edge=max_long_edge, as_rgb=as_rgb)
+        return _url_cache_store(key, response_headers, img)
     except Exception as e:
         raise ValueError(f"Failed to load image from URL: {url} ({e})")
 
@@ -44,17 +166,31 @@ def load_image_from_url(url: str, timeout: int = 10) -> np.ndarray:
 # 3. Load Image from Base64
 # ----------------------------
 
-def load_image_from_base64(b64_str: str) -> np.ndarray:
+def load_image_from_base64(
+    b64_str: Union[str, bytes],
+    jpeg: Optional[TurboJPEG] = None,
+    max_long_edge: Optional[int] = None,
+    as_rgb: bool = False,
+) -> np.ndarray:
     """
-    Decode base64-encoded image string into RGB numpy array.
+    Decode base64-encoded image (str or bytes) into BGR numpy array (RGB if as_rgb).
     Accepts full data URI (e.g. 'data:image/jpeg;base64,...') or raw base64.
     """
     try:
-        if b64_str.startswith("data:image"):
-            b64_str = b64_str.split(",")[1]
-        image_bytes = base64.b64decode(b64_str)
-        image = Image.open(BytesIO(image_bytes)).convert("RGB")
-        return np.array(image)
+        if isinstance(b64_str, str):
+            # Encode once; base64 is pure ASCII, anything else is noise
+            b64_str = b64_str.encode("ascii", "ignore")
+        if b64_str.startswith(b"data:image"):
+            comma = b64_str.find(b",")
+            if comma != -1:
+                b64_str = b64_str[comma + 1:]
+        # binascii's C decoder directly (what b64decode wraps); non-alphabet bytes are skipped
+        try:
+            image_bytes = binascii.a2b_base64(b64_str)
+        except binascii.Error:
+            # Tolerate stripped '=' padding; surplus padding after a full quantum is ignored
+            image_bytes = binascii.a2b_base64(b64_str + b"==")
+        return decode_image(image_bytes, jpeg=jpeg, max_long_edge=max_long_edge, as_rgb=as_rgb)
     except Exception as e:
         raise ValueError(f"Failed to decode base64 image ({e})")
 
@@ -63,18 +199,242 @@ def load_image_from_base64(b64_str: str) -> np.ndarray:
 # 4. Unified Loader (Auto-detect)
 # ----------------------------
 
-def load_image(source: str) -> np.ndarray:
+def load_image(
+    source: str,
+    jpeg: Optional[TurboJPEG] = None,
+    max_long_edge: Optional[int] = None,
+    as_rgb: bool = False,
+) -> np.ndarray:
     """
     Load image from path, URL, or base64 automatically.
-    Returns numpy array in RGB format.
+    Returns numpy array in BGR format (OpenCV's native channel order), or RGB if as_rgb.
+    `jpeg` / `max_long_edge` / `as_rgb` are forwarded to decode_image.
     """
-    # Heuristic detection
+    # Heuristic detection: cheap prefix/length checks first, filesystem stat last
+    stripped = source.strip()
+    if stripped.startswith("data:image"):
+        return load_image_from_base64(stripped, jpeg=jpeg, max_long_edge=max_long_edge, as_rgb=as_rgb)
     if source.startswith("http://") or source.startswith("https://"):
-        return load_image_from_url(source)
-    elif Path(source).exists():
-        return load_image_from_path(source)
-    elif source.strip().startswith("data:image") or len(source.strip()) > 1000:
+        return load_image_from_url(source, jpeg=jpeg, max_long_edge=max_long_edge, as_rgb=as_rgb)
+    if len(stripped) > 1000:
         # long base64 strings usually > 1000 chars
-        return load_image_from_base64(source)
-    else:
-        raise ValueError("Unsupported image source format.")
+        return load_image_from_base64(stripped, jpeg=jpeg, max_long_edge=max_long_edge, as_rgb=as_rgb)
+    if "\n" not in source:
+        path = Path(source)
+        try:
+            is_file = path.is_file()
+        except OSError:  # e.g. name too long for the filesystem
+            is_file = False
+        if is_file:
+            return load_image_from_path(path, jpeg=jpeg, max_long_edge=max_long_edge, as_rgb=as_rgb)
+    raise ValueError("Unsupported image source format.")
+
+
+# ----------------------------
+# 5. Decode Image from Raw Bytes
+# ----------------------------
+
+# Leading bytes needed to recognise every supported format
+IMAGE_HEADER_SIZE = 12
+
+
+def sniff_image_format(head: bytes) -> Optional[str]:
+    """
+    Identify an image from its first bytes (magic numbers), ignoring any client-declared type.
+    Returns "jpeg", "png", "webp", or None for anything else.
+    """
+    if head[:3] == b"\xff\xd8\xff":
+        return "jpeg"
+    if head[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _decode_bytes(buf: Union[bytes, bytearray]) -> np.ndarray:
+    """Decode any OpenCV-supported image buffer into BGR numpy array (no PIL round-trip)."""
+    img = cv2.imdecode(np.frombuffer(buf, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image bytes.")
+    return img
+
+
+def _jpeg_exif_orientation(buf: Union[bytes, bytearray]) -> int:
+    """
+    Read the EXIF Orientation tag (1-8) from a JPEG's APP1 segment; 1 if absent or unreadable.
+    Only the marker segments before the image data are scanned.
+    """
+    pos = 2  # skip SOI
+    end = len(buf)
+    while pos + 4 <= end and buf[pos] == 0xFF:
+        marker = buf[pos + 1]
+        if marker == 0xDA:  # SOS: compressed data follows, no more metadata
+            break
+        length = int.from_bytes(buf[pos + 2:pos + 4], "big")
+        if marker == 0xE1 and buf[pos + 4:pos + 10] == b"Exif\x00\x00":
+            tiff = pos + 10
+            order = "little" if buf[tiff:tiff + 2] == b"II" else "big"
+            ifd = tiff + int.from_bytes(buf[tiff + 4:tiff + 8], order)
+            count = int.from_bytes(buf[ifd:ifd + 2], order)
+            for entry in range(ifd + 2, min(ifd + 2 + 12 * count, end - 9), 12):
+                if int.from_bytes(buf[entry:entry + 2], order) == 0x0112:
+                    orientation = int.from_bytes(buf[entry + 8:entry + 10], order)
+                    return orientation if 1 <= orientation <= 8 else 1
+            return 1
+        pos += 2 + length
+    return 1
+
+
+def _apply_exif_orientation(img: np.ndarray, orientation: int) -> np.ndarray:
+    """Rotate/flip a decoded image so it displays upright (what cv2.imread/imdecode do)."""
+    if orientation == 2:
+        return cv2.flip(img, 1)
+    if orientation == 3:
+        return cv2.rotate(img, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(img, 0)
+    if orientation == 5:
+        return cv2.transpose(img)
+    if orientation == 6:
+        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.flip(cv2.transpose(img), -1)
+    if orientation == 8:
+        return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return img
+
+
+def _jpeg_scaling_factor(long_edge: int, max_long_edge: int) -> Optional[Tuple[int, int]]:
+    """Pick the strongest 1/2, 1/4 or 1/8 IDCT scaling that keeps the long edge >= max_long_edge."""
+    for denom in (8, 4, 2):
+        if long_edge // denom >= max_long_edge:
+            return (1, denom)
+    return None
+
+
+def decode_image(
+    buf: Union[bytes, bytearray],
+    jpeg: Optional[TurboJPEG] = None,
+    max_long_edge: Optional[int] = None,
+    as_rgb: bool = False,
+) -> np.ndarray:
+    """
+    Decode an in-memory image buffer into BGR numpy array.
+    BGR is what every OpenCV consumer here expects, so no channel swap is done by default;
+    as_rgb=True is for RGB-only consumers (TurboJPEG then decodes straight to RGB).
+    JPEG payloads go through TurboJPEG when a handle is given; everything else uses OpenCV.
+    If max_long_edge is set, large JPEGs are downscaled during decoding (libjpeg-turbo's
+    scaled IDCT), never below max_long_edge. EXIF orientation is honoured on both paths.
+    """
+    if not buf:
+        raise ValueError("Empty image buffer.")
+    try:
+        if jpeg is not None and sniff_image_format(buf[:IMAGE_HEADER_SIZE]) == "jpeg":
+            scaling_factor = None
+            if max_long_edge:
+                width, height, _, _ = jpeg.decode_header(buf)
+                scaling_factor = _jpeg_scaling_factor(max(width, height), max_long_edge)
+            pixel_format = TJPF_RGB if as_rgb else TJPF_BGR
+            img = jpeg.decode(buf, pixel_format=pixel_format, scaling_factor=scaling_factor)
+            # libjpeg-turbo ignores EXIF orientation (OpenCV applies it): rotate phone photos upright
+            return _apply_exif_orientation(img, _jpeg_exif_orientation(buf))
+        img = _decode_bytes(buf)
+        if as_rgb:
+            # Freshly decoded 3-channel uint8: swap channels in place, no second H x W x 3 buffer
+            cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+        return img
+    except Exception as e:
+        raise ValueError(f"Failed to decode image bytes ({e})")
+
+
+# ----------------------------
+# 6. Async Batch Loader
+# ----------------------------
+
+# Lazily created on the running event loop; shared by every batch so DNS and TCP are reused
+_AIO_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+def _get_aio_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, creating it on first use."""
+    global _AIO_SESSION
+    if _AIO_SESSION is None or _AIO_SESSION.closed:
+        _AIO_SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, limit_per_host=16, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=10),
+            # Never keep cookies from image hosts between requests (same as _SESSION)
+            cookie_jar=aiohttp.DummyCookieJar(),
+        )
+    return _AIO_SESSION
+
+
+async def close_aio_session() -> None:
+    """Close the shared aiohttp session (call on application shutdown)."""
+    global _AIO_SESSION
+    if _AIO_SESSION is not None:
+        await _AIO_SESSION.close()
+        _AIO_SESSION = None
+
+
+async def load_image_async(
+    source: str,
+    jpeg: Optional[TurboJPEG] = None,
+    max_long_edge: Optional[int] = None,
+    max_bytes: int = MAX_IMAGE_BYTES,
+    as_rgb: bool = False,
+) -> np.ndarray:
+    """
+    Async counterpart of load_image: URLs are downloaded on the event loop (sharing
+    load_image_from_url's cache); decoding and file reads run in a worker thread.
+    """
+    if source.startswith("http://") or source.startswith("https://"):
+        key = (source, max_long_edge, as_rgb)
+        entry, headers = _url_cache_lookup(key)
+        try:
+            async with _get_aio_session().get(source, headers=headers) as response:
+                if response.status == 304 and entry is not None:
+                    return entry[2]
+                response.raise_for_status()
+                _check_content_length(response.headers.get("Content-Length"), max_bytes)
+                buf = bytearray()
+                async for chunk in response.content.iter_chunked(_DOWNLOAD_CHUNK_SIZE):
+                    buf.extend(chunk)
+                    if len(buf) > max_bytes:
+                        raise ValueError(f"Image exceeds {max_bytes} bytes")
+                response_headers = response.headers
+        except Exception as e:
+            raise ValueError(f"Failed to load image from URL: {source} ({e})")
+        img = await asyncio.to_thread(decode_image, buf, jpeg, max_long_edge, as_rgb)
+        return _url_cache_store(key, response_headers, img)
+    return await asyncio.to_thread(load_image, source, jpeg, max_long_edge, as_rgb)
+
+
+async def iter_images(
+    sources: List[str],
+    jpeg: Optional[TurboJPEG] = None,
+    max_long_edge: Optional[int] = None,
+    window: int = 4,
+    max_bytes: int = MAX_IMAGE_BYTES,
+    as_rgb: bool = False,
+) -> AsyncIterator[np.ndarray]:
+    """
+    Yield images (paths, URLs, or base64) in input order as BGR (or RGB) arrays, loading up to
+    `window` sources ahead so downloads overlap with the caller's work on the current image.
+    At most `window` + 1 decoded images are held at once; the first failure is raised in order
+    and the loads still in flight are cancelled.
+    """
+    pending: Deque[asyncio.Future] = deque()
+    queued = iter(sources)
+    try:
+        for source in islice(queued, max(window, 1)):
+            pending.append(asyncio.ensure_future(load_image_async(source, jpeg, max_long_edge, max_bytes, as_rgb)))
+        while pending:
+            img = await pending.popleft()
+            for source in islice(queued, 1):
+                pending.append(asyncio.ensure_future(load_image_async(source, jpeg, max_long_edge, max_bytes, as_rgb)))
+            yield img
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)